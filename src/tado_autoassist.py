@@ -1,8 +1,23 @@
 import os
 import sys
+import math
 import time
+import random
+import asyncio
+import functools
+import json
 import logging
+from logging.handlers import RotatingFileHandler
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
 from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+from PyTado.exceptions import TadoException
+from PyTado.http import Http
 from PyTado.interface import Tado
 
 # --- Configuration ---
@@ -10,7 +25,12 @@ def str_to_bool(val):
     return str(val).strip().lower() in ("true", "1", "yes")
 
 CHECKING_INTERVAL = float(os.environ.get("CHECKING_INTERVAL", 10.0))
+MAX_INTERVAL = float(os.environ.get("MAX_INTERVAL", 300.0))
+PRESENCE_INTERVAL = float(os.environ.get("PRESENCE_INTERVAL", 300.0))
+PRESENCE_REFRESH_INTERVAL = float(os.environ.get("PRESENCE_REFRESH_INTERVAL", 900.0))
 ERROR_RETRY_INTERVAL = float(os.environ.get("ERROR_RETRY_INTERVAL", 30.0))
+MAX_RETRY_INTERVAL = float(os.environ.get("MAX_RETRY_INTERVAL", 600.0))
+ZONES_REFRESH_INTERVAL = float(os.environ.get("ZONES_REFRESH_INTERVAL", 21600.0))
 MIN_TEMP = int(os.environ.get("MIN_TEMP", 5))
 MAX_TEMP = int(os.environ.get("MAX_TEMP", 20))
 ENABLE_TEMP_LIMIT = str_to_bool(os.environ.get("ENABLE_TEMP_LIMIT", "true"))
@@ -32,173 +52,521 @@ stream_handler.setFormatter(formatter)
 logger.addHandler(stream_handler)
 
 if SAVE_LOG:
-    file_handler = logging.FileHandler(LOG_FILE)
+    # MAX_LOG_LINES is turned into a size limit assuming ~200 bytes per log line.
+    file_handler = RotatingFileHandler(LOG_FILE, maxBytes=MAX_LOG_LINES * 200, backupCount=2)
     file_handler.setFormatter(formatter)
     logger.addHandler(file_handler)
 
-# --- Globals ---
-tado = None
-devices_home = []
+# --- HTTP Session ---
+@dataclass
+class CachedResponse:
+    """Body of a GET response together with its `ETag`, parsed lazily on the first 304."""
+    etag: str
+    content: bytes
+    encoding: str
+    parsed: object = None
 
-# --- Core Functions ---
-def authenticate():
-    """
-    Authenticates the user by connecting to the Tado API and handling the device 
-    activation process.
+    def json(self, **kwargs):
+        if self.parsed is None:
+            self.parsed = json.loads(self.content, **kwargs)
+        return self.parsed
 
-    This function checks for the existence of the token file. If the token file is 
-    missing, it initiates the authentication process. If the device activation status 
-    is "PENDING", the user is prompted to visit a URL for authentication. Once the 
-    activation status is "COMPLETED", the function logs a successful login. If the 
-    authentication process fails, the function will retry after a set interval.
+# Shared by all sessions, since PyTado replaces its session on every token refresh.
+_etag_cache = {}
 
-    It handles interruptions via KeyboardInterrupt and logs any exceptions encountered 
-    during the authentication process. In case of errors, the function will retry 
-    after waiting for a specified interval.
+TOKEN_URL = "https://login.tado.com/oauth2/token"
 
-    Raises:
-        KeyboardInterrupt: If the user interrupts the authentication process.
-        Exception: If any unexpected error occurs during the authentication process.
+class TokenRejectedError(TadoException):
+    """Raised when the login server rejects the refresh token (`invalid_grant`)."""
 
-    Returns:
-        None
+def _is_rejected_refresh(response):
     """
-    global tado
-    while True:
-        try:
-            tado = Tado(token_file_path=TOKEN_FILE)
-            if not TOKEN_FILE.exists():
-                logger.info("No token file found. Starting authentication process...")
-
-            status = tado.device_activation_status()
-            if status == "PENDING":
-                print("Please visit the following URL to authenticate:")
-                print(tado.device_verification_url())
-                tado.device_activation()
-                status = tado.device_activation_status()
-
-            if status == "COMPLETED":
-                logger.info("Login successful.")
-                return
-            else:
-                logger.warning(f"Login failed. Current status: {status}. Retrying in {ERROR_RETRY_INTERVAL} seconds...")
-                time.sleep(ERROR_RETRY_INTERVAL)
-        except KeyboardInterrupt:
-            logger.info("Authentication interrupted by user.")
-            sys.exit(0)
-        except Exception as e:
-            logger.error(f"Login error: {e}. Retrying in {ERROR_RETRY_INTERVAL} seconds...")
-            time.sleep(ERROR_RETRY_INTERVAL)
-
-def update_home_status():
+    Tells whether `response` is the login server rejecting a refresh token, as opposed 
+    to any other failure of the token request.
     """
-    Updates the home status based on the presence of devices and the current home state.
-
-    This function checks the presence of devices at home by retrieving the state of mobile 
-    devices with geo-tracking enabled. It compares the number of devices at home to the 
-    current home state (either "HOME" or "AWAY"). Based on this comparison:
-    - If there are no devices at home and the home state is "HOME", it switches the system 
-      to "AWAY" mode.
-    - If there are devices at home and the home state is "AWAY", it switches the system 
-      to "HOME" mode and logs the names of the devices at home.
+    url = urlsplit(response.url)
+    if response.status_code not in (400, 401) or url._replace(query="").geturl() != TOKEN_URL:
+        return False
+    if parse_qs(url.query).get("grant_type") != ["refresh_token"]:
+        return False
+    try:
+        body = response.json()
+    except ValueError:
+        return False
+    return isinstance(body, dict) and body.get("error") == "invalid_grant"
 
-    The function handles errors that may occur during the process, and it logs information 
-    about changes in the home status. It also manages a `KeyboardInterrupt` to allow the user 
-    to interrupt the process manually.
+def _check_status(response, *args, **kwargs):
+    """
+    Response hook raising `requests.HTTPError` (with the response attached) on 429 and 
+    5xx responses, and `TokenRejectedError` when a refresh token is rejected.
+    """
+    if response.status_code == 429:
+        raise requests.HTTPError(f"429 Too Many Requests: {response.url}", response=response)
+    if response.status_code >= 500:
+        raise requests.HTTPError(f"{response.status_code} Server Error: {response.url}", response=response)
+    if _is_rejected_refresh(response):
+        raise TokenRejectedError(f"Refresh token rejected: {response.status_code} invalid_grant")
+
+class ConditionalSession(requests.Session):
+    """
+    `requests.Session` that raises `requests.HTTPError` on 429 and 5xx responses and sends 
+    `If-None-Match` for GET requests it has an `ETag` for.
+
+    PyTado returns the body of a rate-limited response as if it were data, so the 429 is 
+    raised (with the response attached) for `retry_delay` to honor its `Retry-After`. 
+    PyTado also reports any failed token refresh as a rejected token, so server errors 
+    are raised as well, and a real rejection as `TokenRejectedError`. This is done by `_check_status`, inserted in `send` as the first hook of every request: 
+    PyTado sends prepared requests directly, and those only carry their own hooks, the 
+    first of which (`_log_response`) parses the body as JSON, which fails for the plain 
+    text body a 429 may have.
+
+    A 304 response is turned into a 200 carrying the cached body, and its `json()` returns 
+    the already parsed object, so unchanged responses (e.g. zones, zoneStates) are neither 
+    downloaded nor parsed again. The returned objects are shared and must not be mutated.
+    """
+    def send(self, request, **kwargs):
+        cached = _etag_cache.get(request.url) if request.method == "GET" else None
+        if cached is not None:
+            request.headers["If-None-Match"] = cached.etag
+        hooks = request.hooks["response"]
+        if _check_status not in hooks:
+            hooks.insert(0, _check_status)
+
+        response = super().send(request, **kwargs)
+        if response.status_code == 304 and cached is not None:
+            response.status_code = 200
+            response._content = cached.content
+            # A 304 has no Content-Type; without an encoding `response.text` would run 
+            # charset detection over the whole cached body.
+            response.encoding = cached.encoding
+            response.json = cached.json
+        elif request.method == "GET" and response.status_code == 200 and "ETag" in response.headers:
+            _etag_cache[request.url] = CachedResponse(
+                response.headers["ETag"], response.content, response.encoding or "utf-8"
+            )
+        return response
+
+def create_http_session():
+    """
+    Creates the `requests.Session` used for the Tado API, with a keep-alive connection pool 
+    (one connection per host, as the EXECUTOR makes one request at a time), so requests 
+    reuse the already open TLS connection instead of opening (and discarding) new ones. 
+    GET requests are made conditional through `ConditionalSession`.
+    """
+    session = ConditionalSession()
+    adapter = HTTPAdapter(pool_connections=2, pool_maxsize=1, pool_block=True)
+    session.mount("https://", adapter)
+    return session
 
-    Raises:
-        KeyboardInterrupt: If the user interrupts the update process.
-        Exception: If any error occurs while retrieving or updating the home status.
+def _create_pooled_session(self):
+    session = create_http_session()
+    session.hooks["response"].append(self._log_response)
+    return session
 
-    Returns:
-        None
+def _save_token_atomically(self):
+    """
+    Replaces PyTado's `Http._save_token`: the refresh token is written to a temporary file 
+    that then atomically replaces the token file, so an interruption never leaves a 
+    truncated token behind.
     """
-    global devices_home
+    if not self._token_file_path or not self._token_refresh:
+        return
+
+    token_file = Path(self._token_file_path)
+    tmp_file = token_file.with_suffix(".tmp")
     try:
-        home_state = tado.get_home_state().get("presence")
-        devices_home = [
-            dev["name"] for dev in tado.get_mobile_devices()
-            if dev["settings"].get("geoTrackingEnabled") and
-            dev.get("location") and
-            dev["location"].get("atHome")
-        ]
-
-        if not devices_home and home_state == "HOME":
-            logger.info("No devices at home. Switching to AWAY mode.")
-            tado.set_away()
-        elif devices_home and home_state == "AWAY":
-            logger.info(f"Devices at home: {', '.join(devices_home)}. Switching to HOME mode.")
-            tado.set_home()
+        token_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump({"refresh_token": self._token_refresh}, f)
+        os.replace(tmp_file, token_file)
+    except OSError as e:
+        logger.error("Failed to save token: %s", e)
+        raise TadoException(e) from e
+
+# PyTado recreates its session on every token refresh, so the pooled session is installed 
+# through its session factory rather than passed once as `http_session`. PyTado also saves 
+# every rotated refresh token right away; only the write itself is made atomic.
+Http._create_session = _create_pooled_session
+Http._save_token = _save_token_atomically
 
-    except KeyboardInterrupt:
-        logger.info("Update interrupted by user.")
-        sys.exit(0)
-    except Exception as e:
-        logger.error(f"Error updating home status: {e}")
-        raise
+# --- Globals ---
+# Single worker thread for the blocking PyTado calls: PyTado's `Http` is not thread-safe (a 
+# token refresh closes and replaces the session, and each refresh token can only be used 
+# once), so its calls must not overlap.
+EXECUTOR = ThreadPoolExecutor(max_workers=1, thread_name_prefix="tado")
 
-def monitor_zones():
+# --- Core Functions ---
+async def run_blocking(func, *args, **kwargs):
+    """
+    Runs a blocking (PyTado) call on the EXECUTOR thread and awaits its result. Calls 
+    made concurrently are run one after the other.
     """
-    Monitors the zones for open window status and temperature limits, adjusting 
-    heating settings accordingly.
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(EXECUTOR, functools.partial(func, *args, **kwargs))
 
-    This function continuously checks the status of each zone and performs the following:
-    - Detects if a window is open in any of the zones, and if detected, activates the 
-      OpenWindow mode to adjust the heating.
-    - Monitors the temperature in zones where heating is enabled and applies limits:
-        - If the current temperature exceeds the maximum allowed temperature (MAX_TEMP), 
-          it lowers the temperature.
-        - If the current temperature is below the minimum allowed temperature (MIN_TEMP), 
-          it raises the temperature.
+def jitter(interval, spread):
+    """
+    Randomizes an interval by up to +/- `spread` (e.g. 0.15 for 15%) so that several 
+    instances started at the same time do not keep polling the Tado API in lockstep.
+    """
+    return interval * random.uniform(1 - spread, 1 + spread)
 
-    The function repeats this process in a loop, periodically checking the status of each zone.
+def retry_after(error):
+    """
+    Returns the delay (in seconds) requested by the Tado API through the `Retry-After` 
+    header of a 429 response attached to `error`, capped at MAX_RETRY_INTERVAL, or None 
+    if there is no (valid) such header.
+    """
+    response = getattr(error, "response", None)
+    if getattr(response, "status_code", None) != 429:
+        return None
 
-    Handles KeyboardInterrupt to allow for user interruption and logs any errors encountered 
-    during monitoring, retrying the process after a specified interval.
+    value = response.headers.get("Retry-After")
+    if value is None:
+        return None
+    try:
+        delay = float(value)
+    except ValueError:
+        try:
+            delay = (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds()
+        except (TypeError, ValueError):
+            return None
+    if math.isnan(delay):
+        return None
+    return min(max(0.0, delay), MAX_RETRY_INTERVAL)
+
+def retry_delay(error, backoff):
+    """
+    Computes how long to wait before retrying after `error`.
+
+    The `Retry-After` header of a rate-limited response is honored when present. Otherwise 
+    the current `backoff` (capped at MAX_RETRY_INTERVAL) is used with +/- 20% jitter.
+    """
+    delay = retry_after(error)
+    if delay is None:
+        delay = jitter(min(backoff, MAX_RETRY_INTERVAL), 0.2)
+    return delay
 
-    Raises:
-        KeyboardInterrupt: If the user interrupts the monitoring process.
-        Exception: If any unexpected error occurs during the monitoring process.
+def _extract(state):
+    """
+    Returns the (type, power, celsius) tuple of the zone setting in `state`. The 
+    temperature is None when the setting has no target temperature (e.g. heating off).
+    """
+    setting = state['setting']
+    return setting['type'], setting['power'], (setting.get('temperature') or {}).get('celsius')
 
-    Returns:
-        None
+# --- Monitor ---
+class TadoMonitor:
+    """
+    Keeps the Tado connection and the monitoring state (presence, zones, token) and runs 
+    the authentication and monitoring loops.
     """
-    logger.info("Monitoring zones for window status and temperature limits...")
-    while True:
+    __slots__ = (
+        "tado",
+        "devices_home",
+        "zones",
+        "_last_presence",
+        "_last_presence_at",
+        "_last_presence_check",
+        "_zones_fetched_at",
+    )
+
+    def __init__(self):
+        self.tado = None
+        self.devices_home = []
+        self.zones = {}
+        self._last_presence = None
+        self._last_presence_at = None
+        self._last_presence_check = None
+        self._zones_fetched_at = None
+
+    async def authenticate(self):
+        """
+        Authenticates the user by connecting to the Tado API and handling the device 
+        activation process.
+
+        This function lets PyTado read the refresh token from the token file and use it to 
+        log in without user interaction; PyTado also saves every rotated refresh token to 
+        that file. If the token file is missing, or the login server rejects the saved token 
+        (`invalid_grant`), it initiates the authentication process (the rejected token is 
+        kept as `token.rejected`). Any other failure keeps the token. If the device 
+        activation status is "PENDING", the user is prompted to visit a URL for 
+        authentication. Once the activation status is "COMPLETED", the function logs a 
+        successful login. If the authentication process fails, the function will retry with 
+        an exponential backoff, starting at ERROR_RETRY_INTERVAL and capped at 
+        MAX_RETRY_INTERVAL.
+
+        The blocking PyTado calls are run in the EXECUTOR thread pool so the event loop 
+        stays free. It handles cancellation (e.g. Ctrl + C) and logs any exceptions 
+        encountered during the authentication process.
+
+        Raises:
+            asyncio.CancelledError: If the user interrupts the authentication process.
+            Exception: If any unexpected error occurs during the authentication process.
+
+        Returns:
+            None
+        """
+        backoff = ERROR_RETRY_INTERVAL
+        while True:
+            try:
+                if not TOKEN_FILE.exists():
+                    logger.info("No token file found. Starting authentication process...")
+
+                try:
+                    self.tado = await run_blocking(Tado, token_file_path=TOKEN_FILE)
+                except TokenRejectedError:
+                    logger.warning("Saved token was rejected. Starting authentication process...")
+                    os.replace(TOKEN_FILE, TOKEN_FILE.with_suffix(".rejected"))
+                    self.tado = await run_blocking(Tado, token_file_path=TOKEN_FILE)
+                status = self.tado.device_activation_status()
+
+                if status == "PENDING":
+                    print("Please visit the following URL to authenticate:")
+                    print(self.tado.device_verification_url())
+                    await run_blocking(self.tado.device_activation)
+                    status = self.tado.device_activation_status()
+
+                if status == "COMPLETED":
+                    logger.info("Login successful.")
+                    return
+                else:
+                    delay = retry_delay(None, backoff)
+                    backoff = min(backoff * 2, MAX_RETRY_INTERVAL)
+                    logger.warning("Login failed. Current status: %s. Retrying in %.1f seconds...", status, delay)
+                    await asyncio.sleep(delay)
+            except asyncio.CancelledError:
+                logger.info("Authentication interrupted by user.")
+                raise
+            except Exception as e:
+                delay = retry_delay(e, backoff)
+                backoff = min(backoff * 2, MAX_RETRY_INTERVAL)
+                logger.error("Login error: %s. Retrying in %.1f seconds...", e, delay)
+                await asyncio.sleep(delay)
+
+    async def update_home_status(self):
+        """
+        Updates the home status based on the presence of devices and the current home state.
+
+        This function checks the presence of devices at home by retrieving the state of mobile 
+        devices with geo-tracking enabled. It compares the number of devices at home to the 
+        current home state (either "HOME" or "AWAY"). Based on this comparison:
+        - If there are no devices at home and the home state is "HOME", it switches the system 
+          to "AWAY" mode.
+        - If there are devices at home and the home state is "AWAY", it switches the system 
+          to "HOME" mode and logs the names of the devices at home.
+
+        The last presence written (or confirmed) is cached, so the home state is only fetched 
+        when the devices at home suggest a different presence, or when the cached presence is 
+        older than PRESENCE_REFRESH_INTERVAL seconds. A presence changed elsewhere (e.g. 
+        manually in the Tado app) is therefore corrected within that interval. The function handles 
+        errors that may occur during the process, and it logs information about changes in the 
+        home status. It also handles cancellation to allow the user to interrupt the process 
+        manually.
+
+        Raises:
+            asyncio.CancelledError: If the user interrupts the update process.
+            Exception: If any error occurs while retrieving or updating the home status.
+
+        Returns:
+            bool: True if the home presence was switched, False otherwise.
+        """
         try:
-            update_home_status()
-
-            for zone in tado.get_zones():
-                zone_id = zone["id"]
-                zone_name = zone["name"]
-                state = tado.get_state(zone_id)
-
-                if tado.get_open_window_detected(zone_id).get("openWindowDetected"):
-                    logger.info(f"{zone_name}: Open window detected. Activating OpenWindow mode.")
-                    tado.set_open_window(zone_id)
-
-                if ENABLE_TEMP_LIMIT and state['setting']['type'] == 'HEATING' and state['setting']['power'] == "ON":
-                    current_temp = float(state['setting']['temperature']['celsius'])
-                    if current_temp > MAX_TEMP:
-                        tado.set_zone_overlay(zone_id, 0, MAX_TEMP)
-                        logger.info(f"{zone_name}: Temp {current_temp}°C > max {MAX_TEMP}°C. Lowering.")
-                    elif current_temp < MIN_TEMP:
-                        tado.set_zone_overlay(zone_id, 0, MIN_TEMP)
-                        logger.info(f"{zone_name}: Temp {current_temp}°C < min {MIN_TEMP}°C. Raising.")
-    
-            time.sleep(CHECKING_INTERVAL)
-
-        except KeyboardInterrupt:
-            logger.info("Monitoring interrupted by user.")
-            sys.exit(0)
+            mobile_devices = await run_blocking(self.tado.get_mobile_devices)
+            self.devices_home = [
+                dev["name"] for dev in mobile_devices
+                if dev["settings"].get("geoTrackingEnabled") and
+                dev.get("location") and
+                dev["location"].get("atHome")
+            ]
+            presence = "HOME" if self.devices_home else "AWAY"
+            if presence == self._last_presence and time.monotonic() - self._last_presence_at < PRESENCE_REFRESH_INTERVAL:
+                return False
+
+            home_state = (await run_blocking(self.tado.get_home_state)).get("presence")
+            switched = False
+            if presence == "AWAY" and home_state == "HOME":
+                logger.info("No devices at home. Switching to AWAY mode.")
+                await run_blocking(self.tado.set_away)
+                switched = True
+            elif presence == "HOME" and home_state == "AWAY":
+                logger.info("Devices at home: %s. Switching to HOME mode.", ", ".join(self.devices_home))
+                await run_blocking(self.tado.set_home)
+                switched = True
+            self._last_presence = presence
+            self._last_presence_at = time.monotonic()
+            return switched
+
+        except asyncio.CancelledError:
+            logger.info("Update interrupted by user.")
+            raise
         except Exception as e:
-            logger.error(f"Monitoring error: {e}. Retrying in {ERROR_RETRY_INTERVAL} seconds...")
-            time.sleep(ERROR_RETRY_INTERVAL)
+            self._last_presence = None
+            logger.error("Error updating home status: %s", e)
+            raise
+
+    async def refresh_zones(self):
+        """
+        Fetches the list of zones from the Tado API and stores it in the zones cache.
+
+        Returns:
+            dict: The zone names keyed by zone id.
+        """
+        self.zones = {zone["id"]: zone["name"] for zone in await run_blocking(self.tado.get_zones)}
+        self._zones_fetched_at = time.monotonic()
+        return self.zones
+
+    async def get_zones(self):
+        """
+        Returns the cached zones, fetching them again only if the cache is empty or older 
+        than ZONES_REFRESH_INTERVAL.
+
+        Returns:
+            dict: The zone names keyed by zone id.
+        """
+        if self._zones_fetched_at is None or time.monotonic() - self._zones_fetched_at >= ZONES_REFRESH_INTERVAL:
+            return await self.refresh_zones()
+        return self.zones
+
+    async def get_all_zone_states(self):
+        """
+        Retrieves the state of every zone with a single request to the `zoneStates` endpoint.
+
+        Returns:
+            dict: The zone states keyed by zone id.
+        """
+        zone_states = await run_blocking(self.tado.get_zone_states)
+        return {int(zone_id): state for zone_id, state in zone_states["zoneStates"].items()}
+
+    async def process_zone(self, zone_id, zone_name, state):
+        """
+        Checks a single zone for an open window and applies the temperature limits.
+
+        If a window is open, the OpenWindow mode is activated. If heating is enabled and the 
+        set temperature is outside of the [MIN_TEMP, MAX_TEMP] range, an overlay is applied to 
+        bring it back within the limits.
+
+        Args:
+            zone_id (int): The id of the zone.
+            zone_name (str): The name of the zone, used for logging.
+            state (dict): The zone state as returned by the `zoneStates` endpoint.
+
+        Returns:
+            bool: True if an action was taken on the zone, False otherwise.
+        """
+        changed = False
+        if state.get("openWindowDetected"):
+            logger.info("%s: Open window detected. Activating OpenWindow mode.", zone_name)
+            await run_blocking(self.tado.set_open_window, zone_id)
+            changed = True
+
+        if not ENABLE_TEMP_LIMIT:
+            return changed
+
+        setting_type, power, current_temp = _extract(state)
+        if setting_type == 'HEATING' and power == "ON" and current_temp is not None:
+            current_temp = float(current_temp)
+            if current_temp > MAX_TEMP:
+                await run_blocking(self.tado.set_zone_overlay, zone_id, 0, MAX_TEMP)
+                logger.info("%s: Temp %s°C > max %s°C. Lowering.", zone_name, current_temp, MAX_TEMP)
+                changed = True
+            elif current_temp < MIN_TEMP:
+                await run_blocking(self.tado.set_zone_overlay, zone_id, 0, MIN_TEMP)
+                logger.info("%s: Temp %s°C < min %s°C. Raising.", zone_name, current_temp, MIN_TEMP)
+                changed = True
+        return changed
+
+    async def monitor_zones(self):
+        """
+        Monitors the zones for open window status and temperature limits, adjusting 
+        heating settings accordingly.
+
+        This function continuously checks the status of each zone and performs the following:
+        - Detects if a window is open in any of the zones, and if detected, activates the 
+          OpenWindow mode to adjust the heating.
+        - Monitors the temperature in zones where heating is enabled and applies limits:
+            - If the current temperature exceeds the maximum allowed temperature (MAX_TEMP), 
+              it lowers the temperature.
+            - If the current temperature is below the minimum allowed temperature (MIN_TEMP), 
+              it raises the temperature.
+
+        The home presence is updated every PRESENCE_INTERVAL seconds, and right after an error. 
+        The function repeats this process in a loop, periodically checking the status of each zone. 
+        The zones are cached and only fetched again every ZONES_REFRESH_INTERVAL seconds or 
+        when an unknown zone shows up, and the state of all of them is retrieved with a single 
+        request per cycle. Zones that need an action are processed as concurrent tasks, 
+        whose PyTado calls are run one at a time by the EXECUTOR.
+
+        The polling interval adapts to the activity: it starts at CHECKING_INTERVAL, grows by 
+        20% after every cycle without any action (up to MAX_INTERVAL), and goes back to 
+        CHECKING_INTERVAL as soon as a zone or the home presence is changed.
+
+        Handles cancellation to allow for user interruption and logs any errors encountered 
+        during monitoring, retrying the process with an exponential backoff that is reset after 
+        the first successful cycle. Rate-limited responses honor the `Retry-After` header.
+
+        Raises:
+            asyncio.CancelledError: If the user interrupts the monitoring process.
+            Exception: If any unexpected error occurs during the monitoring process.
+
+        Returns:
+            None
+        """
+        logger.info("Monitoring zones for window status and temperature limits...")
+        backoff = ERROR_RETRY_INTERVAL
+        interval = CHECKING_INTERVAL
+        while True:
+            try:
+                presence_changed = False
+                if self._last_presence_check is None or time.monotonic() - self._last_presence_check >= PRESENCE_INTERVAL:
+                    presence_changed = await self.update_home_status()
+                    self._last_presence_check = time.monotonic()
+
+                zones = await self.get_zones()
+                zone_states = await self.get_all_zone_states()
+                if not zone_states.keys() <= zones.keys():
+                    logger.info("Unknown zone found. Refreshing zones.")
+                    zones = await self.refresh_zones()
+
+                process_zone = self.process_zone
+                tasks = [
+                    asyncio.create_task(process_zone(zone_id, zones.get(zone_id, zone_id), state))
+                    for zone_id, state in zone_states.items()
+                ]
+                zones_changed = await asyncio.gather(*tasks)
+
+                backoff = ERROR_RETRY_INTERVAL
+                if presence_changed or any(zones_changed):
+                    interval = CHECKING_INTERVAL
+                else:
+                    interval = min(interval * 1.2, MAX_INTERVAL)
+                await asyncio.sleep(jitter(interval, 0.15))
+
+            except asyncio.CancelledError:
+                logger.info("Monitoring interrupted by user.")
+                raise
+            except Exception as e:
+                # Force a fresh presence check and fast polling on the next cycle.
+                self._last_presence_check = None
+                interval = CHECKING_INTERVAL
+                delay = retry_delay(e, backoff)
+                backoff = min(backoff * 2, MAX_RETRY_INTERVAL)
+                logger.error("Monitoring error: %s. Retrying in %.1f seconds...", e, delay)
+                await asyncio.sleep(delay)
 
 # --- Entry Point ---
-def main():
-    authenticate()
-    monitor_zones()
+async def main():
+    monitor = TadoMonitor()
+    await monitor.authenticate()
+    await monitor.monitor_zones()
 
 if __name__ == "__main__":
-    main()
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        # A blocking PyTado call (e.g. device_activation) may still be running in the 
+        # EXECUTOR; don't wait for the worker threads to finish it before exiting.
+        EXECUTOR.shutdown(wait=False, cancel_futures=True)
+        logging.shutdown()
+        sys.stdout.flush()
+        os._exit(0)
@@ -1,30 +1,37 @@
 # tests/test_tado_autoassist.py
+import asyncio
+import json
+import time
 import pytest
-from unittest.mock import patch, MagicMock
+from types import SimpleNamespace
+from unittest.mock import patch, AsyncMock, MagicMock, PropertyMock
+import requests
 import tado_autoassist as ta  # Adjust module name if different
 
-@patch("tado_autoassist.Path.exists", return_value=True)
 @patch("tado_autoassist.Tado")
-def test_authenticate_success(mock_tado_class, mock_path_exists):
+def test_authenticate_success(mock_tado_class, tmp_path):
     # Setup mock Tado object
     mock_tado = MagicMock()
     mock_tado.device_activation_status.return_value = "COMPLETED"
     mock_tado_class.return_value = mock_tado
 
+    token_file = tmp_path / "token"
+    token_file.write_text(json.dumps({"refresh_token": "saved-token"}))
+
     # Run the function under test
-    ta.authenticate()
+    with patch("tado_autoassist.TOKEN_FILE", token_file):
+        asyncio.run(ta.TadoMonitor().authenticate())
 
-    # Assert Tado was instantiated
-    mock_tado_class.assert_called_once()
+    # Assert Tado was instantiated with the token file
+    mock_tado_class.assert_called_once_with(token_file_path=token_file)
 
     # Assert device_activation_status was called
     mock_tado.device_activation_status.assert_called()
 
     # If it reaches here, function completed successfully
 
-@patch("tado_autoassist.Path.exists", return_value=False)
 @patch("tado_autoassist.Tado")
-def test_authenticate_pending_then_completed(mock_tado_class, mock_path_exists):
+def test_authenticate_pending_then_completed(mock_tado_class, tmp_path):
     # Mock device activation status: first PENDING, then COMPLETED
     mock_tado = MagicMock()
     mock_tado.device_activation_status.side_effect = ["PENDING", "COMPLETED"]
@@ -34,11 +41,377 @@ def test_authenticate_pending_then_completed(mock_tado_class, mock_path_exists):
     # Prevent device_activation from doing anything unusual
     mock_tado.device_activation.return_value = None
 
-    # Run the function under test
-    ta.authenticate()
+    # Run the function under test without a token file
+    with patch("tado_autoassist.TOKEN_FILE", tmp_path / "token"):
+        asyncio.run(ta.TadoMonitor().authenticate())
 
     # device_activation_status should be called at least twice, device_activation once
     assert mock_tado.device_activation_status.call_count >= 2
     mock_tado.device_activation.assert_called_once()
 
+@patch("tado_autoassist.asyncio.sleep", new_callable=AsyncMock)
+@patch("tado_autoassist.Tado")
+def test_authenticate_rejected_token_starts_device_flow(mock_tado_class, mock_sleep, tmp_path):
+    # The login server rejects the saved token, then PyTado starts the device flow
+    mock_tado = MagicMock()
+    mock_tado.device_activation_status.side_effect = ["PENDING", "COMPLETED"]
+    mock_tado_class.side_effect = [ta.TokenRejectedError("invalid_grant"), mock_tado]
+
+    token_file = tmp_path / "token"
+    token_file.write_text(json.dumps({"refresh_token": "expired-token"}))
+
+    with patch("tado_autoassist.TOKEN_FILE", token_file):
+        asyncio.run(ta.TadoMonitor().authenticate())
+
+    mock_sleep.assert_not_awaited()
+    mock_tado.device_activation.assert_called_once()
+    assert not token_file.exists()
+    assert json.loads(token_file.with_suffix(".rejected").read_text()) == {"refresh_token": "expired-token"}
+
+def test_save_token_is_atomic(tmp_path):
+    token_file = tmp_path / "token"
+    http = SimpleNamespace(_token_file_path=str(token_file), _token_refresh="refresh-token")
+
+    ta.Http._save_token(http)
+
+    assert json.loads(token_file.read_text()) == {"refresh_token": "refresh-token"}
+    assert not token_file.with_suffix(".tmp").exists()
+
+def test_process_zone_lowers_temperature_above_max():
+    mock_tado = MagicMock()
+    state = {
+        "setting": {"type": "HEATING", "power": "ON", "temperature": {"celsius": ta.MAX_TEMP + 5}}
+    }
+
+    monitor = ta.TadoMonitor()
+    monitor.tado = mock_tado
+
+    assert asyncio.run(monitor.process_zone(1, "Living Room", state))
+
+    mock_tado.set_open_window.assert_not_called()
+    mock_tado.set_zone_overlay.assert_called_once_with(1, 0, ta.MAX_TEMP)
+
+def test_get_all_zone_states_uses_single_request():
+    mock_tado = MagicMock()
+    mock_tado.get_zone_states.return_value = {
+        "zoneStates": {"1": {"openWindowDetected": True}, "2": {}}
+    }
+
+    monitor = ta.TadoMonitor()
+    monitor.tado = mock_tado
+
+    zone_states = asyncio.run(monitor.get_all_zone_states())
+
+    mock_tado.get_zone_states.assert_called_once()
+    mock_tado.get_state.assert_not_called()
+    assert zone_states == {1: {"openWindowDetected": True}, 2: {}}
+
+def test_get_zones_is_cached():
+    mock_tado = MagicMock()
+    mock_tado.get_zones.return_value = [{"id": 1, "name": "Living Room"}]
+
+    monitor = ta.TadoMonitor()
+    monitor.tado = mock_tado
+
+    assert asyncio.run(monitor.get_zones()) == {1: "Living Room"}
+    assert asyncio.run(monitor.get_zones()) == {1: "Living Room"}
+
+    mock_tado.get_zones.assert_called_once()
+
+def test_retry_delay_honors_retry_after_on_429():
+    error = Exception("Too Many Requests")
+    error.response = MagicMock(status_code=429, headers={"Retry-After": "120"})
+
+    assert ta.retry_delay(error, ta.ERROR_RETRY_INTERVAL) == 120.0
+
+def test_retry_delay_caps_retry_after():
+    error = Exception("Too Many Requests")
+    error.response = MagicMock(status_code=429, headers={"Retry-After": "inf"})
+
+    assert ta.retry_delay(error, ta.ERROR_RETRY_INTERVAL) == ta.MAX_RETRY_INTERVAL
+
+def test_retry_delay_is_capped():
+    delay = ta.retry_delay(Exception("boom"), ta.MAX_RETRY_INTERVAL * 8)
+
+    assert delay <= ta.MAX_RETRY_INTERVAL * 1.2
+
+def test_update_home_status_skips_known_presence():
+    mock_tado = MagicMock()
+    mock_tado.get_mobile_devices.return_value = []
+    mock_tado.get_home_state.return_value = {"presence": "HOME"}
+
+    monitor = ta.TadoMonitor()
+    monitor.tado = mock_tado
+
+    assert asyncio.run(monitor.update_home_status())
+    assert not asyncio.run(monitor.update_home_status())
+
+    mock_tado.get_home_state.assert_called_once()
+    mock_tado.set_away.assert_called_once()
+
+def test_update_home_status_revalidates_expired_presence():
+    mock_tado = MagicMock()
+    mock_tado.get_mobile_devices.return_value = []
+    mock_tado.get_home_state.return_value = {"presence": "AWAY"}
+
+    monitor = ta.TadoMonitor()
+    monitor.tado = mock_tado
+
+    assert not asyncio.run(monitor.update_home_status())
+
+    # The presence was switched to HOME manually meanwhile
+    mock_tado.get_home_state.return_value = {"presence": "HOME"}
+    assert not asyncio.run(monitor.update_home_status())
+    monitor._last_presence_at -= ta.PRESENCE_REFRESH_INTERVAL
+    assert asyncio.run(monitor.update_home_status())
+
+    assert mock_tado.get_home_state.call_count == 2
+    mock_tado.set_away.assert_called_once()
+
+def test_update_home_status_counts_geo_tracked_devices_at_home():
+    mock_tado = MagicMock()
+    mock_tado.get_mobile_devices.return_value = [
+        {"id": 1, "name": "Phone", "settings": {"geoTrackingEnabled": True}, "location": {"atHome": True}},
+        {"id": 2, "name": "Tablet", "settings": {"geoTrackingEnabled": False}, "location": {"atHome": True}},
+        {"id": 3, "name": "Watch", "settings": {"geoTrackingEnabled": True}, "location": None},
+    ]
+    mock_tado.get_home_state.return_value = {"presence": "AWAY"}
+
+    monitor = ta.TadoMonitor()
+    monitor.tado = mock_tado
+
+    assert asyncio.run(monitor.update_home_status())
+    assert monitor.devices_home == ["Phone"]
+    mock_tado.set_home.assert_called_once()
+
+def test_http_session_pool_matches_workers():
+    session = ta.create_http_session()
+    adapter = session.get_adapter("https://my.tado.com/api/v2/")
+
+    assert adapter._pool_maxsize == ta.EXECUTOR._max_workers == 1
+    assert adapter._pool_block
+
+def test_run_blocking_does_not_overlap_pytado_calls():
+    running = []
+    overlapped = []
+
+    def call(i):
+        running.append(i)
+        overlapped.append(len(running) > 1)
+        time.sleep(0.01)
+        running.remove(i)
+        return i
+
+    async def run():
+        return await asyncio.gather(*(ta.run_blocking(call, i) for i in range(4)))
+
+    assert asyncio.run(run()) == [0, 1, 2, 3]
+    assert not any(overlapped)
+
+class FakeAdapter(requests.adapters.BaseAdapter):
+    def __init__(self, responses):
+        super().__init__()
+        self.responses = responses
+        self.requests = []
+
+    def send(self, request, **kwargs):
+        self.requests.append(request)
+        status_code, headers, content = self.responses.pop(0)
+        response = requests.Response()
+        response.status_code = status_code
+        response.headers.update(headers)
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+        response._content = content
+        response.request = request
+        response.url = request.url
+        return response
+
+    def close(self):
+        pass
+
+def test_conditional_session_reuses_body_on_304():
+    adapter = FakeAdapter([
+        (200, {"ETag": '"v1"', "Content-Type": "application/json"}, b'[{"id": 1, "name": "Living Room"}]'),
+        (304, {"ETag": '"v1"'}, b""),
+    ])
+    session = ta.create_http_session()
+    session.mount("https://", adapter)
+    url = "https://my.tado.com/api/v2/homes/1/zones"
+
+    with patch("tado_autoassist._etag_cache", {}):
+        first = session.get(url).json()
+        second = session.get(url)
+
+    assert "If-None-Match" not in adapter.requests[0].headers
+    assert adapter.requests[1].headers["If-None-Match"] == '"v1"'
+    assert second.status_code == 200
+    assert second.encoding == "utf-8"
+    assert second.json() == first
+
+    # The body is decoded with the cached encoding, without charset detection
+    with patch.object(requests.Response, "apparent_encoding", new_callable=PropertyMock) as detect:
+        assert json.loads(second.text) == first
+    detect.assert_not_called()
+
+def test_session_raises_on_429_with_retry_after():
+    adapter = FakeAdapter([(429, {"Retry-After": "120"}, b'{"errors": []}')])
+    session = ta.create_http_session()
+    session.mount("https://", adapter)
+
+    with pytest.raises(requests.HTTPError) as excinfo:
+        session.send(requests.Request("GET", "https://my.tado.com/api/v2/homes/1/zoneStates").prepare())
+
+    assert ta.retry_delay(excinfo.value, ta.ERROR_RETRY_INTERVAL) == 120.0
+
+def test_session_raises_on_429_before_pytado_parses_the_body():
+    http = ta.Http.__new__(ta.Http)  # PyTado's response logging only needs the instance
+    adapter = FakeAdapter([(429, {"Retry-After": "5", "Content-Type": "text/plain"}, b"Too Many Requests")])
+    session = http._create_session()
+    session.mount("https://", adapter)
+
+    # As in PyTado's Http.request
+    prepped = requests.Request("GET", "https://my.tado.com/api/v2/homes/1/zoneStates").prepare()
+    prepped.hooks["response"].append(http._log_response)
+    with pytest.raises(requests.HTTPError) as excinfo:
+        session.send(prepped)
+
+    assert ta.retry_delay(excinfo.value, ta.ERROR_RETRY_INTERVAL) == 5.0
+
+def test_session_raises_token_rejected_only_for_invalid_grant():
+    adapter = FakeAdapter([
+        (400, {}, b'{"error": "invalid_grant"}'),
+        (400, {}, b'{"error": "authorization_pending"}'),
+        (403, {}, b'{"error": "invalid_grant"}'),
+    ])
+    session = ta.create_http_session()
+    session.mount("https://", adapter)
+
+    with pytest.raises(ta.TokenRejectedError):
+        session.post(ta.TOKEN_URL, params={"grant_type": "refresh_token", "refresh_token": "expired"})
+    # PyTado polls the same URL while the device flow is pending
+    assert session.post(ta.TOKEN_URL, params={"grant_type": "device_code"}).status_code == 400
+    assert session.post(ta.TOKEN_URL, params={"grant_type": "refresh_token"}).status_code == 403
+
+def test_authenticate_keeps_token_on_login_server_error(tmp_path):
+    adapter = FakeAdapter([(503, {"Content-Type": "text/html"}, b"<html>Service Unavailable</html>")])
+    session = ta.create_http_session()
+    session.mount("https://", adapter)
+
+    token_file = tmp_path / "token"
+    token_file.write_text(json.dumps({"refresh_token": "valid-token"}))
+
+    # Stop at the first retry
+    with patch("tado_autoassist.create_http_session", return_value=session), \
+         patch("tado_autoassist.TOKEN_FILE", token_file), \
+         patch("tado_autoassist.asyncio.sleep", new_callable=AsyncMock, side_effect=asyncio.CancelledError):
+        with pytest.raises(asyncio.CancelledError):
+            asyncio.run(ta.TadoMonitor().authenticate())
+
+    assert adapter.requests[0].url.startswith(ta.TOKEN_URL)
+    assert json.loads(token_file.read_text()) == {"refresh_token": "valid-token"}
+    assert not token_file.with_suffix(".rejected").exists()
+
+IDLE = {"setting": {"type": "HEATING", "power": "ON", "temperature": {"celsius": ta.MIN_TEMP + 1}}}
+OPEN_WINDOW = dict(IDLE, openWindowDetected=True)
+
+def zone_states(*states):
+    return {"zoneStates": {str(zone_id): state for zone_id, state in enumerate(states, 1)}}
+
+def run_monitor_zones(mock_tado, cycles):
+    """
+    Runs `monitor_zones` until it sleeps for the `cycles`-th time, on a virtual clock 
+    advanced by the sleeps and without jitter, and returns the recorded delays.
+    """
+    clock = SimpleNamespace(now=0.0)
+    delays = []
+
+    async def sleep(delay):
+        delays.append(delay)
+        clock.now += delay
+        if len(delays) == cycles:
+            raise asyncio.CancelledError
+
+    monitor = ta.TadoMonitor()
+    monitor.tado = mock_tado
+    with patch("tado_autoassist.asyncio.sleep", side_effect=sleep), \
+         patch("tado_autoassist.jitter", side_effect=lambda interval, spread: interval), \
+         patch("tado_autoassist.time", SimpleNamespace(monotonic=lambda: clock.now)):
+        with pytest.raises(asyncio.CancelledError):
+            asyncio.run(monitor.monitor_zones())
+    return delays
+
+def idle_tado():
+    mock_tado = MagicMock()
+    mock_tado.get_mobile_devices.return_value = []
+    mock_tado.get_home_state.return_value = {"presence": "AWAY"}
+    mock_tado.get_zones.return_value = [{"id": 1, "name": "Living Room"}]
+    mock_tado.get_zone_states.return_value = zone_states(IDLE)
+    return mock_tado
+
+@patch("tado_autoassist.MAX_INTERVAL", 20.0)
+@patch("tado_autoassist.CHECKING_INTERVAL", 10.0)
+def test_monitor_zones_backs_off_while_idle_and_resets_after_action():
+    mock_tado = idle_tado()
+    mock_tado.get_zone_states.side_effect = [zone_states(IDLE)] * 5 + [zone_states(OPEN_WINDOW)] + [zone_states(IDLE)]
+
+    delays = run_monitor_zones(mock_tado, 7)
+
+    # Grows by 20% up to MAX_INTERVAL, and starts over after the open window was handled
+    assert delays == pytest.approx([12.0, 14.4, 17.28, 20.0, 20.0, 10.0, 12.0])
+    mock_tado.set_open_window.assert_called_once_with(1)
+    assert mock_tado.get_zone_states.call_count == 7
+    mock_tado.get_zones.assert_called_once()
+
+@patch("tado_autoassist.MAX_RETRY_INTERVAL", 100.0)
+@patch("tado_autoassist.ERROR_RETRY_INTERVAL", 30.0)
+@patch("tado_autoassist.PRESENCE_INTERVAL", 1000.0)
+@patch("tado_autoassist.MAX_INTERVAL", 300.0)
+@patch("tado_autoassist.CHECKING_INTERVAL", 10.0)
+def test_monitor_zones_backs_off_on_errors_and_resets_after_success():
+    mock_tado = idle_tado()
+    error = RuntimeError("Tado API unavailable")
+    mock_tado.get_zone_states.side_effect = [
+        zone_states(IDLE), error, error, error, zone_states(IDLE), zone_states(IDLE), error,
+    ]
+
+    delays = run_monitor_zones(mock_tado, 7)
+
+    # Errors double the backoff up to MAX_RETRY_INTERVAL; a successful cycle resets both 
+    # the backoff and the polling interval
+    assert delays == pytest.approx([12.0, 30.0, 60.0, 100.0, 12.0, 14.4, 30.0])
+    # The presence is checked on the first cycle and again right after each of the first 
+    # three errors
+    assert mock_tado.get_mobile_devices.call_count == 4
+
+@patch("tado_autoassist.PRESENCE_INTERVAL", 25.0)
+@patch("tado_autoassist.MAX_INTERVAL", 10.0)
+@patch("tado_autoassist.CHECKING_INTERVAL", 10.0)
+def test_monitor_zones_checks_presence_every_presence_interval():
+    mock_tado = idle_tado()
+
+    delays = run_monitor_zones(mock_tado, 7)
+
+    # Cycles run at t = 0, 10, ..., 60; the presence is checked at t = 0, 30 and 60
+    assert delays == [10.0] * 7
+    assert mock_tado.get_mobile_devices.call_count == 3
+    assert mock_tado.get_zone_states.call_count == 7
+
+def test_monitor_zones_refreshes_zones_on_unknown_zone():
+    mock_tado = idle_tado()
+    mock_tado.get_zones.side_effect = [
+        [{"id": 1, "name": "Living Room"}],
+        [{"id": 1, "name": "Living Room"}, {"id": 2, "name": "Bedroom"}],
+    ]
+    mock_tado.get_zone_states.side_effect = [
+        zone_states(IDLE), zone_states(IDLE, OPEN_WINDOW), zone_states(IDLE, IDLE),
+    ]
+
+    with patch.object(ta.TadoMonitor, "process_zone", autospec=True, side_effect=ta.TadoMonitor.process_zone) as process_zone:
+        run_monitor_zones(mock_tado, 3)
+
+    # Fetched once at start and once for the new zone, then served from the cache
+    assert mock_tado.get_zones.call_count == 2
+    assert (2, "Bedroom", OPEN_WINDOW) in [call.args[1:] for call in process_zone.call_args_list]
+    mock_tado.set_open_window.assert_called_once_with(2)
+
 # You can add more tests following this pattern for the other functions.